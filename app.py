@@ -1,17 +1,33 @@
 import os
 import sys
+import threading
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from dashboard import IthacaWeatherDashboard
+# The dashboard is built on first use rather than at import, so Gunicorn
+# workers don't open SQLite or build the layout until a request arrives
+_dashboard = None
+_dashboard_lock = threading.Lock()
 
-# Create dashboard instance
-dashboard = IthacaWeatherDashboard()
+def get_dashboard():
+    """Create the dashboard instance on first call and reuse it afterwards"""
+    global _dashboard
+    if _dashboard is None:
+        with _dashboard_lock:
+            if _dashboard is None:
+                from dashboard import IthacaWeatherDashboard
+                _dashboard = IthacaWeatherDashboard()
+    return _dashboard
 
-# This is what Render will run
-server = dashboard.app.server
+def get_server():
+    """Return the Flask server behind the dashboard"""
+    return get_dashboard().app.server
+
+def server(environ, start_response):
+    """WSGI entrypoint - this is what Render will run"""
+    return get_server()(environ, start_response)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))
-    dashboard.app.run(host="0.0.0.0", port=port, debug=False)
+    get_dashboard().app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,10 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=1)
+def ensure_env():
+    """Load the .env file and create runtime directories, once per process"""
+    load_dotenv()
+    os.makedirs("data", exist_ok=True)
+    os.makedirs("logs", exist_ok=True)
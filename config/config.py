@@ -1,9 +1,9 @@
 
 import os
-from dotenv import load_dotenv
+from config._env import ensure_env
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file and create data/log directories
+ensure_env()
 
 class Config:
     # OpenWeatherMap API Configuration
@@ -54,7 +54,3 @@ class Config:
             )
         
         return True
-
-# Create directories if they don't exist
-os.makedirs("data", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
@@ -9,16 +9,16 @@ Make sure you have weather data by running the scraper first!
 import sys
 import os
 import subprocess
+import importlib.util
 
 def check_dependencies():
     """Check if required packages are installed"""
     required_packages = ['dash', 'plotly', 'pandas']
     missing_packages = []
     
+    # find_spec only locates the package, it doesn't execute it
     for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
+        if importlib.util.find_spec(package) is None:
             missing_packages.append(package)
     
     if missing_packages:
@@ -1,18 +1,40 @@
 import sqlite3
 import datetime
-import random
 import json
 import os
 
-def create_sample_weather_data(db_path="data/weather.db"):
-    """Generate realistic sample weather data for Ithaca locations"""
+def create_sample_weather_data(db_path="data/weather.db", only_if_empty=False):
+    """Generate realistic sample weather data for Ithaca locations
+    
+    With only_if_empty=True nothing is written if the table already has rows,
+    so several processes can race to seed the same database safely.
+    """
+    
+    # The generator relies on MATERIALIZED CTEs to fix each random() draw
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        raise RuntimeError(
+            f"Sample data generation needs SQLite 3.35 or newer "
+            f"(this Python is linked against SQLite {sqlite3.sqlite_version})"
+        )
     
     # Ensure data directory exists
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
-    conn = sqlite3.connect(db_path)
+    # Sample data is regenerable, so skip durability during the bulk load.
+    # isolation_level=None lets us drive BEGIN/COMMIT ourselves; the timeout
+    # lets a second process wait out another one's load instead of failing.
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    conn.executescript('''
+        PRAGMA journal_mode=MEMORY;
+        PRAGMA synchronous=OFF;
+        PRAGMA temp_store=MEMORY;
+    ''')
     cursor = conn.cursor()
     
+    # Hold the write lock from table creation through the insert, so the
+    # emptiness check and the load happen as one step
+    conn.execute("BEGIN EXCLUSIVE")
+    
     # Create table if it doesn't exist
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS weather_data (
@@ -36,6 +58,14 @@ def create_sample_weather_data(db_path="data/weather.db"):
         )
     ''')
     
+    if only_if_empty:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM weather_data)')
+        if cursor.fetchone()[0]:
+            conn.execute("ROLLBACK")
+            conn.close()
+            print("Sample data already present, skipping generation")
+            return
+    
     locations = {
         "Downtown Ithaca": {"base_temp": 62, "elevation": 0},
         "Cornell Campus": {"base_temp": 60, "elevation": 2},
@@ -53,103 +83,110 @@ def create_sample_weather_data(db_path="data/weather.db"):
     # Generate data for the last 7 days, every 2 hours
     end_time = datetime.datetime.now()
     start_time = end_time - datetime.timedelta(days=7)
-    current_time = start_time
+    num_steps = int((end_time - start_time) / datetime.timedelta(hours=2))
     
     print("Generating sample weather data...")
     
-    while current_time <= end_time:
-        # Base weather pattern for this time
-        hour = current_time.hour
-        day_factor = (hour - 6) / 12  # Temperature variation throughout day
-        day_factor = max(0, min(1, day_factor))
-        
-        # Add some weather variability
-        weather_mood = random.choice(["stable", "changing", "volatile"])
-        base_condition = random.choice(weather_conditions)
-        
-        for location, props in locations.items():
-            # Temperature with realistic variation
-            base_temp = props["base_temp"]
-            temp_variation = props["elevation"] * 2  # Elevation effect
-            daily_variation = day_factor * 15 - 7.5  # Daily temperature swing
-            random_variation = random.uniform(-3, 3)
-            
-            if weather_mood == "volatile":
-                random_variation *= 2
-            
-            temperature = base_temp + temp_variation + daily_variation + random_variation
-            feels_like = temperature + random.uniform(-3, 3)
-            
-            # Other weather parameters
-            humidity = random.randint(40, 90)
-            pressure = random.uniform(29.8, 30.2)
-            visibility = random.uniform(5, 15)
-            uv_index = max(0, random.uniform(0, 8) * day_factor)
-            wind_speed = random.uniform(2, 15)
-            wind_direction = random.choice(wind_directions)
-            wind_degree = wind_directions.index(wind_direction) * 45
-            cloudiness = random.randint(10, 90)
-            is_day = 1 if 6 <= hour <= 18 else 0
-            
-            # Adjust condition based on parameters
-            if cloudiness > 70:
-                condition = "Overcast"
-            elif cloudiness > 40:
-                condition = "Partly cloudy"
-            elif humidity > 80 and random.random() > 0.7:
-                condition = "Light rain"
-            else:
-                condition = base_condition
-            
-            # Create realistic raw data
-            raw_data = {
-                "location": {"name": location},
-                "current": {
-                    "temp_f": round(temperature, 1),
-                    "feelslike_f": round(feels_like, 1),
-                    "humidity": humidity,
-                    "pressure_in": round(pressure, 2),
-                    "vis_miles": round(visibility, 1),
-                    "uv": round(uv_index, 1),
-                    "wind_mph": round(wind_speed, 1),
-                    "wind_dir": wind_direction,
-                    "wind_degree": wind_degree,
-                    "cloud": cloudiness,
-                    "is_day": is_day,
-                    "condition": {"text": condition}
-                }
-            }
-            
-            # Insert data
-            cursor.execute('''
-                INSERT INTO weather_data (
-                    location, timestamp, temperature, feels_like, humidity, pressure,
-                    visibility, uv_index, weather_condition, weather_description, 
-                    wind_speed, wind_direction, wind_degree, cloudiness, is_day, raw_data
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+    # Build every row inside SQLite in a single INSERT ... SELECT. The
+    # MATERIALIZED hints keep each random() draw fixed once it is taken,
+    # otherwise SQLite may re-evaluate it for every column that references it.
+    cursor.execute('''
+        WITH RECURSIVE steps(step) AS (
+            SELECT 0
+            UNION ALL
+            SELECT step + 1 FROM steps WHERE step < :num_steps
+        ),
+        locations(position, location, base_temp, elevation) AS (
+            SELECT id, key, json_extract(value, '$.base_temp'), json_extract(value, '$.elevation')
+            FROM json_each(:locations)
+        ),
+        time_points AS MATERIALIZED (
+            SELECT
+                ts,
+                CAST(strftime('%H', ts) AS INTEGER) AS hour,
+                max(0, min(1, (CAST(strftime('%H', ts) AS INTEGER) - 6) / 12.0)) AS day_factor,
+                abs(random() % 3) = 2 AS volatile,
+                json_extract(:weather_conditions,
+                             printf('$[%d]', abs(random() % json_array_length(:weather_conditions)))) AS base_condition
+            FROM (
+                SELECT strftime('%Y-%m-%d %H:%M:%f', :start_time, printf('+%d hours', step * 2)) AS ts
+                FROM steps
+            )
+        ),
+        readings AS MATERIALIZED (
+            SELECT
+                position,
+                location,
+                ts,
+                hour,
+                base_condition,
+                base_temp + elevation * 2 + (day_factor * 15 - 7.5)
+                    + (abs(random() % 1000000) / 1000000.0 * 6 - 3) * (CASE WHEN volatile THEN 2 ELSE 1 END) AS temperature,
+                abs(random() % 1000000) / 1000000.0 * 6 - 3 AS feels_like_offset,
+                40 + abs(random() % 51) AS humidity,
+                29.8 + abs(random() % 1000000) / 1000000.0 * 0.4 AS pressure,
+                5 + abs(random() % 1000000) / 1000000.0 * 10 AS visibility,
+                max(0, abs(random() % 1000000) / 1000000.0 * 8 * day_factor) AS uv_index,
+                2 + abs(random() % 1000000) / 1000000.0 * 13 AS wind_speed,
+                abs(random() % 8) AS wind_index,
+                10 + abs(random() % 81) AS cloudiness,
+                abs(random() % 1000000) / 1000000.0 AS rain_roll
+            FROM time_points CROSS JOIN locations
+        ),
+        samples AS (
+            SELECT
+                position,
                 location,
-                current_time,
-                round(temperature, 1),
-                round(feels_like, 1),
+                ts,
+                round(temperature, 1) AS temperature,
+                round(temperature + feels_like_offset, 1) AS feels_like,
                 humidity,
-                round(pressure, 2),
-                round(visibility, 1),
-                round(uv_index, 1),
-                condition,
-                condition,
-                round(wind_speed, 1),
-                wind_direction,
-                wind_degree,
+                round(pressure, 2) AS pressure,
+                round(visibility, 1) AS visibility,
+                round(uv_index, 1) AS uv_index,
+                CASE
+                    WHEN cloudiness > 70 THEN 'Overcast'
+                    WHEN cloudiness > 40 THEN 'Partly cloudy'
+                    WHEN humidity > 80 AND rain_roll > 0.7 THEN 'Light rain'
+                    ELSE base_condition
+                END AS condition,
+                round(wind_speed, 1) AS wind_speed,
+                json_extract(:wind_directions, printf('$[%d]', wind_index)) AS wind_direction,
+                wind_index * 45 AS wind_degree,
                 cloudiness,
-                is_day,
-                json.dumps(raw_data)
-            ))
-        
-        # Move to next time point (every 2 hours)
-        current_time += datetime.timedelta(hours=2)
-    
-    conn.commit()
+                hour BETWEEN 6 AND 18 AS is_day
+            FROM readings
+        )
+        INSERT INTO weather_data (
+            location, timestamp, temperature, feels_like, humidity, pressure,
+            visibility, uv_index, weather_condition, weather_description, 
+            wind_speed, wind_direction, wind_degree, cloudiness, is_day
+        )
+        SELECT
+            location, ts, temperature, feels_like, humidity, pressure,
+            visibility, uv_index, condition, condition,
+            wind_speed, wind_direction, wind_degree, cloudiness, is_day
+        FROM samples
+        ORDER BY ts, position
+    ''', {
+        'num_steps': num_steps,
+        'start_time': start_time,
+        'locations': json.dumps(locations),
+        'weather_conditions': json.dumps(weather_conditions),
+        'wind_directions': json.dumps(wind_directions)
+    })
+    conn.execute("COMMIT")
+    
+    # Index after the bulk load so the dashboard's time-range queries can seek
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_weather_ts_loc
+        ON weather_data (timestamp DESC, location)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_weather_loc_ts
+        ON weather_data (location, timestamp DESC)
+    ''')
+    cursor.execute('ANALYZE')
     
     # Print summary
     cursor.execute('SELECT COUNT(*) FROM weather_data')
@@ -1,107 +1,317 @@
 import dash
-from dash import dcc, html, Input, Output, callback
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+from dash import dcc, html, Input, Output
 import sqlite3
 from datetime import datetime, timedelta
+from functools import lru_cache
 import os
-from dotenv import load_dotenv
+import sys
+import threading
+
+# Make the project root importable when run as `python src/dashboard.py`
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from config._env import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
+
+# pandas and plotly are imported inside the methods that use them so that
+# importing this module (and building the layout) stays cheap
+
+# Longer temperature series are downsampled before they reach the browser
+MAX_POINTS_PER_SERIES = 500
+
+# Static layout pieces, built once at import rather than per dashboard instance
+_TIME_RANGE_OPTIONS = [
+    {'label': 'Last 6 Hours', 'value': 6},
+    {'label': 'Last 24 Hours', 'value': 24},
+    {'label': 'Last 3 Days', 'value': 72},
+    {'label': 'Last Week', 'value': 168}
+]
+
+_HEADER = html.Div([
+    html.H1("Ithaca Weather Intelligence Dashboard", 
+           style={'textAlign': 'center', 'color': '#2c3e50', 'marginBottom': '10px'}),
+    html.P("Because Ithaca weather is beautifully unpredictable", 
+          style={'textAlign': 'center', 'color': '#7f8c8d', 'fontStyle': 'italic'}),
+    html.Hr()
+])
+
+_FOOTER = html.Div([
+    html.Hr(),
+    html.P([
+        "Data monitoring: Downtown Ithaca, Cornell Campus, Ithaca College, and Cayuga Lake | ",
+        html.A("View Source Code", href="https://github.com/kpeis695/ithaca-weather-dashboard", 
+              target="_blank")
+    ], style={'textAlign': 'center', 'color': '#95a5a6', 'fontSize': '12px'})
+])
+
+@lru_cache(maxsize=64)
+def _render_card(location, temperature, feels_like, condition, humidity, wind_speed):
+    """Build a current-conditions card; unchanged readings reuse the cached card"""
+    return html.Div([
+        html.H4(location, style={'margin': '0', 'color': '#2c3e50'}),
+        html.H2(f"{temperature}°F", 
+               style={'margin': '5px 0', 'color': '#e74c3c'}),
+        html.P(f"Feels like {feels_like}°F", 
+              style={'margin': '0', 'color': '#7f8c8d'}),
+        html.P(condition, 
+              style={'margin': '0', 'fontWeight': 'bold', 'color': '#34495e'}),
+        html.P(f"Humidity: {humidity}% | Wind: {wind_speed} mph", 
+              style={'margin': '5px 0 0 0', 'fontSize': '12px', 'color': '#95a5a6'})
+    ], style={
+        'backgroundColor': '#f8f9fa',
+        'padding': '15px',
+        'borderRadius': '8px',
+        'textAlign': 'center',
+        'boxShadow': '0 2px 4px rgba(0,0,0,0.1)',
+        'margin': '10px'
+    })
+
+def _lttb_indices(x, y, n_out):
+    """Pick the indices kept by Largest-Triangle-Three-Buckets downsampling"""
+    import numpy as np
+    
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # The first and last points are always kept; the points in between are
+    # split into n_out - 2 buckets and each bucket contributes the point
+    # forming the largest triangle with the previous pick and the next
+    # bucket's average
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    
+    return keep
 
 class IthacaWeatherDashboard:
+    # Current conditions shown when the database has no recent readings
+    _DEMO_LATEST_TEMPLATE = {
+        "Downtown Ithaca": {
+            'temperature': 62.3, 'feels_like': 64.1, 'condition': 'Partly Cloudy',
+            'humidity': 68, 'wind_speed': 7.2, 'timestamp': None
+        },
+        "Cornell Campus": {
+            'temperature': 60.8, 'feels_like': 62.5, 'condition': 'Overcast',
+            'humidity': 72, 'wind_speed': 8.1, 'timestamp': None
+        },
+        "Ithaca College": {
+            'temperature': 61.5, 'feels_like': 63.2, 'condition': 'Cloudy',
+            'humidity': 70, 'wind_speed': 6.8, 'timestamp': None
+        },
+        "Cayuga Lake": {
+            'temperature': 64.1, 'feels_like': 65.8, 'condition': 'Partly Cloudy',
+            'humidity': 65, 'wind_speed': 5.9, 'timestamp': None
+        }
+    }
+    
     def __init__(self, db_path="data/weather.db"):
         self.db_path = db_path
+        self._conn = None
+        self._conn_lock = threading.Lock()
         self.app = dash.Dash(__name__)
         self.demo_mode = not os.path.exists(db_path)
+        self._sample_attempted = False
+        # Per-instance figure cache keyed on (hours, newest timestamp in the DB)
+        self._build_charts = lru_cache(maxsize=32)(self._build_charts)
         self.setup_layout()
         self.setup_callbacks()
     
     def create_sample_data_if_needed(self):
         """Create sample data if no database exists"""
+        # Only ever try once per process, even if generation fails
+        if self._sample_attempted:
+            return
+        
         if self.demo_mode:
+            self._sample_attempted = True
             try:
-                # Import and run sample data generator
+                # Import and run sample data generator; other workers may be
+                # seeding the same file, so only fill an empty table
                 from sample_data import create_sample_weather_data
-                create_sample_weather_data(self.db_path)
+                create_sample_weather_data(self.db_path, only_if_empty=True)
                 self.demo_mode = False
                 print("✅ Created sample data for demo")
             except Exception as e:
                 print(f"⚠️ Running in demo mode without data: {e}")
     
+    def _get_connection(self):
+        """Return the shared read-only connection, opening it on first use"""
+        # Callers must hold self._conn_lock; None until the database exists.
+        # WAL mode is set by the scraper - a read-only connection can't switch it.
+        if self._conn is None and os.path.exists(self.db_path):
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            self._conn = conn
+        return self._conn
+    
+    def get_data_version(self):
+        """Get the newest timestamp in the database, or None if there is no data"""
+        try:
+            if self.demo_mode:
+                self.create_sample_data_if_needed()
+            
+            with self._conn_lock:
+                conn = self._get_connection()
+                if conn is None:
+                    return None
+                return conn.execute('SELECT MAX(timestamp) FROM weather_data').fetchone()[0]
+        except Exception as e:
+            print(f"Error reading database: {e}")
+            return None
+    
     def get_weather_data(self, hours=24):
-        """Get weather data from database"""
+        """Get weather data for the last N hours from the database"""
+        import pandas as pd
+        
         try:
             # Try to create sample data if needed
             if self.demo_mode:
                 self.create_sample_data_if_needed()
             
-            if not os.path.exists(self.db_path):
-                return pd.DataFrame()
-            
-            conn = sqlite3.connect(self.db_path)
-            
             since = datetime.now() - timedelta(hours=hours)
             query = '''
-                SELECT * FROM weather_data 
+                SELECT timestamp, location, temperature, feels_like,
+                       weather_condition, humidity, wind_speed
+                FROM weather_data 
                 WHERE timestamp > ? 
                 ORDER BY timestamp DESC
             '''
             
-            df = pd.read_sql_query(query, conn, params=[since])
-            conn.close()
+            with self._conn_lock:
+                conn = self._get_connection()
+                if conn is None:
+                    return pd.DataFrame()
+                df = pd.read_sql_query(query, conn, params=[since],
+                                       parse_dates={'timestamp': {'format': 'ISO8601'}})
             
-            if not df.empty:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
+            return df
+        except Exception as e:
+            print(f"Error reading database: {e}")
+            return pd.DataFrame()
+    
+    def get_raw_weather_data(self, hours=24):
+        """Get every stored column, including raw_data, for the last N hours"""
+        import pandas as pd
+        
+        # The charts only need the columns from get_weather_data
+        try:
+            since = datetime.now() - timedelta(hours=hours)
+            with self._conn_lock:
+                conn = self._get_connection()
+                if conn is None:
+                    return pd.DataFrame()
+                df = pd.read_sql_query('''
+                    SELECT * FROM weather_data 
+                    WHERE timestamp > ? 
+                    ORDER BY timestamp DESC
+                ''', conn, params=[since],
+                   parse_dates={'timestamp': {'format': 'ISO8601'}})
             
             return df
         except Exception as e:
             print(f"Error reading database: {e}")
             return pd.DataFrame()
     
+    def get_hourly_temperature_range(self, hours=24):
+        """Get (hour, max - min temperature) pairs for the last N hours"""
+        try:
+            if self.demo_mode:
+                self.create_sample_data_if_needed()
+            
+            since = datetime.now() - timedelta(hours=hours)
+            with self._conn_lock:
+                conn = self._get_connection()
+                if conn is None:
+                    return []
+                return conn.execute('''
+                    SELECT strftime('%Y-%m-%d %H:00', timestamp) AS hour,
+                           MAX(temperature) - MIN(temperature) AS temp_range
+                    FROM weather_data 
+                    WHERE timestamp > ? 
+                    GROUP BY hour
+                    ORDER BY hour
+                ''', (since,)).fetchall()
+        except Exception as e:
+            print(f"Error reading database: {e}")
+            return []
+    
     def get_latest_conditions(self):
         """Get the most recent weather conditions for all locations"""
-        df = self.get_weather_data(hours=1)
-        if df.empty:
-            # Return demo data if no real data
-            return {
-                "Downtown Ithaca": {
-                    'temperature': 62.3, 'feels_like': 64.1, 'condition': 'Partly Cloudy',
-                    'humidity': 68, 'wind_speed': 7.2, 'timestamp': datetime.now()
-                },
-                "Cornell Campus": {
-                    'temperature': 60.8, 'feels_like': 62.5, 'condition': 'Overcast',
-                    'humidity': 72, 'wind_speed': 8.1, 'timestamp': datetime.now()
-                },
-                "Ithaca College": {
-                    'temperature': 61.5, 'feels_like': 63.2, 'condition': 'Cloudy',
-                    'humidity': 70, 'wind_speed': 6.8, 'timestamp': datetime.now()
-                },
-                "Cayuga Lake": {
-                    'temperature': 64.1, 'feels_like': 65.8, 'condition': 'Partly Cloudy',
-                    'humidity': 65, 'wind_speed': 5.9, 'timestamp': datetime.now()
+        latest_data = {}
+        try:
+            # Try to create sample data if needed
+            if self.demo_mode:
+                self.create_sample_data_if_needed()
+            
+            # The subquery finds each location's newest timestamp via
+            # idx_weather_loc_ts; only those rows are read back
+            since = datetime.now() - timedelta(hours=1)
+            rows = []
+            with self._conn_lock:
+                conn = self._get_connection()
+                if conn is not None:
+                    rows = conn.execute('''
+                        SELECT location, temperature, feels_like, weather_condition,
+                               humidity, wind_speed, timestamp
+                        FROM weather_data 
+                        WHERE (location, timestamp) IN (
+                            SELECT location, MAX(timestamp)
+                            FROM weather_data 
+                            WHERE timestamp > ? 
+                            GROUP BY location
+                        )
+                        ORDER BY timestamp DESC
+                    ''', (since,)).fetchall()
+            
+            for (location, temperature, feels_like, condition,
+                 humidity, wind_speed, ts) in rows:
+                latest_data[location] = {
+                    'temperature': temperature,
+                    'feels_like': feels_like,
+                    'condition': condition,
+                    'humidity': humidity,
+                    'wind_speed': wind_speed,
+                    'timestamp': datetime.fromisoformat(ts)
                 }
-            }
+        except Exception as e:
+            print(f"Error reading database: {e}")
         
-        latest_data = {}
-        for location in df['location'].unique():
-            location_data = df[df['location'] == location].iloc[0]
-            latest_data[location] = {
-                'temperature': location_data.get('temperature', 'N/A'),
-                'feels_like': location_data.get('feels_like', 'N/A'),
-                'condition': location_data.get('weather_condition', 'N/A'),
-                'humidity': location_data.get('humidity', 'N/A'),
-                'wind_speed': location_data.get('wind_speed', 'N/A'),
-                'timestamp': location_data.get('timestamp', 'N/A')
+        if not latest_data:
+            # Return demo data if no real data
+            now = datetime.now()
+            return {
+                location: {**data, 'timestamp': now}
+                for location, data in self._DEMO_LATEST_TEMPLATE.items()
             }
         
         return latest_data
     
     def create_temperature_chart(self, hours=24):
         """Create temperature comparison chart"""
+        import plotly.graph_objects as go
+        
         df = self.get_weather_data(hours=hours)
         
         if df.empty:
@@ -113,12 +323,29 @@ class IthacaWeatherDashboard:
                 showarrow=False, font_size=14, align="center"
             )
         
-        fig = px.line(df, x='timestamp', y='temperature', 
-                     color='location', 
-                     title=f'Temperature Trends - Last {hours} Hours',
-                     labels={'temperature': 'Temperature (°F)', 'timestamp': 'Time'})
+        # One WebGL trace per location, built directly rather than via px.line
+        fig = go.Figure()
+        for location, location_data in df.groupby('location', sort=False):
+            if len(location_data) > MAX_POINTS_PER_SERIES:
+                location_data = location_data.dropna(subset=['temperature']).sort_values('timestamp')
+                keep = _lttb_indices(
+                    location_data['timestamp'].astype('datetime64[ns]').to_numpy().astype('int64'),
+                    location_data['temperature'].to_numpy(dtype=float),
+                    MAX_POINTS_PER_SERIES
+                )
+                location_data = location_data.iloc[keep]
+            
+            fig.add_trace(go.Scattergl(
+                x=location_data['timestamp'],
+                y=location_data['temperature'],
+                mode='lines',
+                name=location
+            ))
         
         fig.update_layout(
+            title=f'Temperature Trends - Last {hours} Hours',
+            xaxis_title='Time',
+            yaxis_title='Temperature (°F)',
             height=400,
             hovermode='x unified',
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
@@ -126,9 +353,12 @@ class IthacaWeatherDashboard:
         
         return fig
     
-    def create_conditions_chart(self):
+    def create_conditions_chart(self, latest=None):
         """Create current conditions comparison"""
-        latest = self.get_latest_conditions()
+        import plotly.graph_objects as go
+        
+        if latest is None:
+            latest = self.get_latest_conditions()
         
         if not latest:
             return go.Figure().add_annotation(
@@ -137,9 +367,11 @@ class IthacaWeatherDashboard:
                 showarrow=False, font_size=16
             )
         
-        locations = list(latest.keys())
-        temperatures = [latest[loc]['temperature'] for loc in locations]
-        feels_like = [latest[loc]['feels_like'] for loc in locations]
+        # Split the readings into parallel columns in a single pass
+        locations, temperatures, feels_like = zip(*(
+            (location, data['temperature'], data['feels_like'])
+            for location, data in latest.items()
+        ))
         
         fig = go.Figure()
         
@@ -170,9 +402,11 @@ class IthacaWeatherDashboard:
     
     def create_weather_variance_chart(self, hours=24):
         """Create weather variance analysis"""
-        df = self.get_weather_data(hours=hours)
+        import plotly.graph_objects as go
         
-        if df.empty:
+        variance_data = self.get_hourly_temperature_range(hours=hours)
+        
+        if not variance_data:
             return go.Figure().add_annotation(
                 text="🌡️ Weather Unpredictability Analysis<br>" +
                      "This chart shows temperature variance across Ithaca locations<br>" +
@@ -181,16 +415,13 @@ class IthacaWeatherDashboard:
                 showarrow=False, font_size=14, align="center"
             )
         
-        # Calculate temperature variance by hour
-        df['hour'] = df['timestamp'].dt.floor('h')
-        variance_data = df.groupby('hour')['temperature'].agg(['min', 'max', 'std']).reset_index()
-        variance_data['range'] = variance_data['max'] - variance_data['min']
+        hour_labels, temp_ranges = zip(*variance_data)
         
         fig = go.Figure()
         
-        fig.add_trace(go.Scatter(
-            x=variance_data['hour'],
-            y=variance_data['range'],
+        fig.add_trace(go.Scattergl(
+            x=hour_labels,
+            y=temp_ranges,
             mode='lines+markers',
             name='Temperature Range',
             line=dict(color='red', width=3)
@@ -205,6 +436,13 @@ class IthacaWeatherDashboard:
         
         return fig
     
+    def _build_charts(self, hours, data_version):
+        """Build the time-range charts; cached on (hours, data_version) in __init__"""
+        return (
+            self.create_temperature_chart(hours),
+            self.create_weather_variance_chart(hours)
+        )
+    
     def setup_layout(self):
         """Setup the dashboard layout"""
         demo_banner = html.Div([
@@ -227,13 +465,7 @@ class IthacaWeatherDashboard:
             demo_banner,
             
             # Header
-            html.Div([
-                html.H1("Ithaca Weather Intelligence Dashboard", 
-                       style={'textAlign': 'center', 'color': '#2c3e50', 'marginBottom': '10px'}),
-                html.P("Because Ithaca weather is beautifully unpredictable", 
-                      style={'textAlign': 'center', 'color': '#7f8c8d', 'fontStyle': 'italic'}),
-                html.Hr()
-            ]),
+            _HEADER,
             
             # Current conditions cards
             html.Div(id='current-conditions', style={'marginBottom': '30px'}),
@@ -243,12 +475,7 @@ class IthacaWeatherDashboard:
                 html.Label("Select Time Range:", style={'fontWeight': 'bold', 'marginBottom': '10px'}),
                 dcc.Dropdown(
                     id='time-range-dropdown',
-                    options=[
-                        {'label': 'Last 6 Hours', 'value': 6},
-                        {'label': 'Last 24 Hours', 'value': 24},
-                        {'label': 'Last 3 Days', 'value': 72},
-                        {'label': 'Last Week', 'value': 168}
-                    ],
+                    options=_TIME_RANGE_OPTIONS,
                     value=24,
                     style={'width': '200px'}
                 )
@@ -269,14 +496,7 @@ class IthacaWeatherDashboard:
             ),
             
             # Footer
-            html.Div([
-                html.Hr(),
-                html.P([
-                    "Data monitoring: Downtown Ithaca, Cornell Campus, Ithaca College, and Cayuga Lake | ",
-                    html.A("View Source Code", href="https://github.com/kpeis695/ithaca-weather-dashboard", 
-                          target="_blank")
-                ], style={'textAlign': 'center', 'color': '#95a5a6', 'fontSize': '12px'})
-            ])
+            _FOOTER
         ], style={'padding': '20px', 'fontFamily': 'Arial, sans-serif'})
     
     def setup_callbacks(self):
@@ -296,25 +516,10 @@ class IthacaWeatherDashboard:
             cards = []
             
             for location, data in latest.items():
-                card = html.Div([
-                    html.H4(location, style={'margin': '0', 'color': '#2c3e50'}),
-                    html.H2(f"{data['temperature']}°F", 
-                           style={'margin': '5px 0', 'color': '#e74c3c'}),
-                    html.P(f"Feels like {data['feels_like']}°F", 
-                          style={'margin': '0', 'color': '#7f8c8d'}),
-                    html.P(data['condition'], 
-                          style={'margin': '0', 'fontWeight': 'bold', 'color': '#34495e'}),
-                    html.P(f"Humidity: {data['humidity']}% | Wind: {data['wind_speed']} mph", 
-                          style={'margin': '5px 0 0 0', 'fontSize': '12px', 'color': '#95a5a6'})
-                ], style={
-                    'backgroundColor': '#f8f9fa',
-                    'padding': '15px',
-                    'borderRadius': '8px',
-                    'textAlign': 'center',
-                    'boxShadow': '0 2px 4px rgba(0,0,0,0.1)',
-                    'margin': '10px'
-                })
-                cards.append(card)
+                cards.append(_render_card(
+                    location, data['temperature'], data['feels_like'],
+                    data['condition'], data['humidity'], data['wind_speed']
+                ))
             
             conditions_div = html.Div(cards, style={
                 'display': 'flex',
@@ -322,14 +527,17 @@ class IthacaWeatherDashboard:
                 'flexWrap': 'wrap'
             }) if cards else html.Div("No current data available")
             
-            # Charts
-            temp_chart = self.create_temperature_chart(hours)
-            conditions_chart = self.create_conditions_chart()
-            variance_chart = self.create_weather_variance_chart(hours)
+            # The conditions chart reuses the readings fetched for the cards
+            conditions_chart = self.create_conditions_chart(latest)
+            
+            # Time-range charts are only rebuilt when the range or the data changes
+            temp_chart, variance_chart = self._build_charts(
+                hours, self.get_data_version()
+            )
             
             return conditions_div, temp_chart, conditions_chart, variance_chart
     
-    def run(self, debug=True, port=8050):
+    def run(self, debug=False, port=8050):
         """Run the dashboard"""
         print(f"🌤️ Starting Ithaca Weather Dashboard...")
         print(f"📊 Dashboard will be available at: http://localhost:{port}")
@@ -1,14 +1,51 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
 import sqlite3
 import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
+import threading
 import time
 
+# One field per weather_data column, in table order; built once rather than per query
+WeatherRow = namedtuple('WeatherRow', [
+    'id', 'location', 'timestamp', 'temperature', 'feels_like', 'humidity',
+    'pressure', 'visibility', 'uv_index', 'weather_condition', 'weather_description',
+    'wind_speed', 'wind_direction', 'wind_degree', 'cloudiness', 'is_day', 'raw_data'
+])
+
+class RateLimiter:
+    """Token bucket that only blocks once the call budget for the period is spent"""
+    
+    def __init__(self, calls: int, period: float):
+        self.capacity = calls
+        self.rate = calls / period
+        self.tokens = float(calls)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping only if the bucket is empty"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+            else:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.updated = time.monotonic()
+                self.tokens = 0.0
+
 class IthacaWeatherScraper:
-    def __init__(self, api_key: str, db_path: str = "data/weather.db"):
+    def __init__(self, api_key: str, db_path: str = "data/weather.db", store_raw: bool = False):
         self.api_key = api_key
         self.db_path = db_path
+        # Nothing reads raw_data back, so the full API response is only kept on request
+        self.store_raw = store_raw
         self.base_url = "http://api.weatherapi.com/v1/current.json"
         
         # Ithaca area locations
@@ -19,13 +56,28 @@ class IthacaWeatherScraper:
             "Cayuga Lake": {"lat": 42.4301, "lon": -76.5370}
         }
         
+        # Reuse one HTTP session so keep-alive connections are shared between
+        # calls, with one pooled connection per concurrently fetched location
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(self.locations))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Stay under the API's per-minute limit without pacing every call
+        self.rate_limiter = RateLimiter(calls=60, period=60)
+        
         self.setup_database()
+        self._read_conn = None
+        self._read_lock = threading.Lock()
     
     def setup_database(self):
         """Initialize SQLite database with weather data table"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL lets the dashboard keep reading while a scrape is writing
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS weather_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -48,6 +100,18 @@ class IthacaWeatherScraper:
             )
         ''')
         
+        # Time-range scans for the dashboard and recent-data queries
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_weather_ts_loc
+            ON weather_data (timestamp DESC, location)
+        ''')
+        
+        # Latest reading per location
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_weather_loc_ts
+            ON weather_data (location, timestamp DESC)
+        ''')
+        
         conn.commit()
         conn.close()
     
@@ -64,11 +128,12 @@ class IthacaWeatherScraper:
             'aqi': 'no'
         }
         
+        self.rate_limiter.acquire()
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self.session.get(self.base_url, params=params)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"Error fetching weather for {location_name}: {e}")
             return None
     
@@ -93,21 +158,28 @@ class IthacaWeatherScraper:
             'wind_degree': current.get('wind_degree'),
             'cloudiness': current.get('cloud'),
             'is_day': current.get('is_day'),
-            'raw_data': json.dumps(raw_data)
+            'raw_data': orjson.dumps(raw_data).decode() if self.store_raw else None
         }
     
     def save_weather_data(self, weather_data: Dict):
         """Save parsed weather data to database"""
+        self.save_weather_data_batch([weather_data])
+    
+    def save_weather_data_batch(self, rows: List[Dict]):
+        """Save several parsed weather readings in a single transaction"""
         conn = sqlite3.connect(self.db_path)
+        # synchronous is per-connection; NORMAL is safe under WAL and skips
+        # an fsync on every commit
+        conn.execute('PRAGMA synchronous=NORMAL')
         cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor.executemany('''
             INSERT INTO weather_data (
                 location, timestamp, temperature, feels_like, humidity, pressure,
                 visibility, uv_index, weather_condition, weather_description, 
                 wind_speed, wind_direction, wind_degree, cloudiness, is_day, raw_data
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        ''', [(
             weather_data['location'],
             weather_data['timestamp'],
             weather_data['temperature'],
@@ -124,7 +196,7 @@ class IthacaWeatherScraper:
             weather_data['cloudiness'],
             weather_data['is_day'],
             weather_data['raw_data']
-        ))
+        ) for weather_data in rows])
         
         conn.commit()
         conn.close()
@@ -133,41 +205,55 @@ class IthacaWeatherScraper:
         """Scrape weather data for all Ithaca locations"""
         print(f"Starting weather scrape at {datetime.datetime.now()}")
         
-        for location_name in self.locations:
+        location_names = list(self.locations)
+        for location_name in location_names:
             print(f"Fetching weather for {location_name}...")
-            
-            raw_data = self.get_current_weather(location_name)
+        
+        # The requests are independent and network-bound, so fetch them all at once
+        with ThreadPoolExecutor(max_workers=len(location_names)) as executor:
+            responses = list(executor.map(self.get_current_weather, location_names))
+        
+        parsed_rows = []
+        for location_name, raw_data in zip(location_names, responses):
             if raw_data:
-                parsed_data = self.parse_weather_data(raw_data, location_name)
-                self.save_weather_data(parsed_data)
-                temp = parsed_data['temperature']
-                condition = parsed_data['weather_condition']
-                print(f"✅ Saved {location_name}: {temp}°F, {condition}")
+                parsed_rows.append(self.parse_weather_data(raw_data, location_name))
             else:
                 print(f"❌ Failed to fetch data for {location_name}")
-            
-            # Be nice to the API
-            time.sleep(1)
+        
+        if parsed_rows:
+            self.save_weather_data_batch(parsed_rows)
+            for parsed_data in parsed_rows:
+                temp = parsed_data['temperature']
+                condition = parsed_data['weather_condition']
+                print(f"✅ Saved {parsed_data['location']}: {temp}°F, {condition}")
         
         print("Weather scrape completed!")
     
-    def get_recent_data(self, hours: int = 24) -> List[Dict]:
-        """Get weather data from the last N hours"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """Return the shared read-only connection, opening it on first use"""
+        if self._read_conn is None:
+            self._read_conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            self._read_conn.execute("PRAGMA mmap_size=268435456")
+            self._read_conn.execute("PRAGMA cache_size=-65536")
+        return self._read_conn
+    
+    def get_recent_data(self, hours: int = 24) -> List[WeatherRow]:
+        """Get weather data from the last N hours as named tuples"""
         since = datetime.datetime.now() - datetime.timedelta(hours=hours)
         
-        cursor.execute('''
-            SELECT * FROM weather_data 
-            WHERE timestamp > ? 
-            ORDER BY timestamp DESC
-        ''', (since,))
-        
-        columns = [description[0] for description in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        with self._read_lock:
+            cursor = self._get_read_connection().cursor()
+            # Name the columns so they always line up with WeatherRow's fields
+            cursor.execute(f'''
+                SELECT {', '.join(WeatherRow._fields)} FROM weather_data 
+                WHERE timestamp > ? 
+                ORDER BY timestamp DESC
+            ''', (since,))
+            
+            results = list(map(WeatherRow._make, cursor.fetchall()))
         
-        conn.close()
         return results
     
     def get_location_summary(self):
@@ -178,15 +264,19 @@ class IthacaWeatherScraper:
             print("No recent data found. Run scrape_all_locations() first.")
             return
         
+        # Rows are newest first, so the first row seen per location is the latest
+        latest = {}
+        for row in recent_data:
+            latest.setdefault(row.location, row)
+        
         print("\n=== ITHACA WEATHER SNAPSHOT ===")
         for location in self.locations:
-            location_data = [d for d in recent_data if d['location'] == location]
-            if location_data:
-                data = location_data[0]  # Most recent
-                print(f"{location}: {data['temperature']}°F ({data['weather_condition']}) - Feels like {data['feels_like']}°F")
+            data = latest.get(location)
+            if data:
+                print(f"{location}: {data.temperature}°F ({data.weather_condition}) - Feels like {data.feels_like}°F")
         
         # Calculate temperature variance
-        temps = [d['temperature'] for d in recent_data if d['temperature']]
+        temps = [row.temperature for row in recent_data if row.temperature]
         if len(temps) > 1:
             temp_range = max(temps) - min(temps)
             print(f"\nTemperature variance across locations: {temp_range:.1f}°F")